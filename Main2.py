@@ -1,17 +1,27 @@
 import os
+import io
+import subprocess
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from dotenv import load_dotenv
 import gradio as gr
+import numpy as np
 import requests
-from contextlib import contextmanager
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 from datetime import datetime
 import uuid
 import logging
-import speech_recognition as sr
-from moviepy import VideoFileClip
-from sqlalchemy import inspect, text
+from functools import lru_cache
+from cachetools import TTLCache, cached
+from cachetools.func import ttl_cache
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert, inspect, text
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
@@ -35,6 +45,30 @@ migrate = Migrate(app, db)
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 gemini_api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
+# Shared HTTP session so Gemini calls reuse pooled keep-alive connections. Only failed
+# connection attempts are retried: generateContent is billable and not idempotent, so a
+# request that reached Gemini is never resent on a read error or error status.
+SESSION = requests.Session()
+adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32,
+                      max_retries=Retry(connect=3, read=0, status=0, backoff_factor=0.2))
+SESSION.mount("https://", adapter)
+GEMINI_TIMEOUT = (3.05, 30)
+BASE_HEADERS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+# streamGenerateContent with alt=sse sends the reply as server-sent events, one JSON chunk per "data:" line
+STREAM_URL_WITH_KEY = f"{gemini_api_url.replace(':generateContent', ':streamGenerateContent')}?alt=sse&key={gemini_api_key}"
+# Model metadata endpoint; a GET here checks connectivity without a billable generateContent call
+gemini_model_url = gemini_api_url.replace(':generateContent', '')
+
+# Worker pool for blocking audio/video transcription so the Gradio event loop stays free
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
+# Maximum number of concurrent runs per Gradio event handler
+CONCURRENCY_LIMIT = 8
+
+# Number of previous turns from the current chat included in the prompt
+HISTORY_TURNS = 20
+# Page size for the Chat History tab (most recent conversations first)
+HISTORY_LIMIT = 100
+
 # Database models
 class Character(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -44,6 +78,10 @@ class Character(db.Model):
 
 class Conversation(db.Model):
     __tablename__ = 'conversation'
+    __table_args__ = (
+        db.Index('ix_conv_user_chat_ts', 'user_id', 'chat_id', 'timestamp'),
+        db.Index('ix_conv_user_ts', 'user_id', 'timestamp'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
     user_input = db.Column(db.Text, nullable=True)
@@ -52,10 +90,13 @@ class Conversation(db.Model):
     chat_id = db.Column(db.String(36), nullable=True)
     user_id = db.Column(db.Integer, nullable=False)
 
-@contextmanager
-def app_context():
-    with app.app_context():
-        yield
+# Gradio runs handlers on worker threads, so give each thread its own session bound
+# to the Flask-SQLAlchemy engine instead of pushing an app context per call.
+# The default thread-local registry lets a session go away with its thread, and helpers
+# remove() the session when done so its connection goes back to the pool.
+with app.app_context():
+    engine = db.engine
+DBSession = scoped_session(sessionmaker(bind=engine))
 
 # def reset_and_initialize_database():
 #     """Drop existing tables, recreate them, and verify the schema."""
@@ -81,123 +122,222 @@ def app_context():
         #     raise
 
 def add_predefined_characters():
-    with app_context():
-        characters = [
-            {"name": "Chuck the Clown", "description": "A funny clown who tells jokes and entertains.", "prompt_template": "You are Chuck the Clown, always ready with a joke and entertainment. Be upbeat, silly, and include jokes in your responses."},
-            {"name": "Sarcastic Pirate", "description": "A pirate with a sharp tongue and a love for treasure.", "prompt_template": "You are a Sarcastic Pirate, ready to share your tales of adventure. Use pirate slang, be witty, sarcastic, and mention your love for treasure and the sea."},
-            {"name": "Professor Sage", "description": "A wise professor knowledgeable about many subjects.", "prompt_template": "You are Professor Sage, sharing wisdom and knowledge. Be scholarly, thoughtful, and provide educational information in your responses."}
-        ]
-
-        for char_data in characters:
-            if not Character.query.filter_by(name=char_data["name"]).first():
-                new_character = Character(name=char_data["name"], description=char_data["description"], prompt_template=char_data["prompt_template"])
-                db.session.add(new_character)
-                logger.info(f"Adding predefined character: {char_data['name']}")
-        
-        try:
-            db.session.commit()
-            logger.info("Predefined characters added successfully.")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error adding predefined characters: {e}")
+    characters = [
+        {"name": "Chuck the Clown", "description": "A funny clown who tells jokes and entertains.", "prompt_template": "You are Chuck the Clown, always ready with a joke and entertainment. Be upbeat, silly, and include jokes in your responses."},
+        {"name": "Sarcastic Pirate", "description": "A pirate with a sharp tongue and a love for treasure.", "prompt_template": "You are a Sarcastic Pirate, ready to share your tales of adventure. Use pirate slang, be witty, sarcastic, and mention your love for treasure and the sea."},
+        {"name": "Professor Sage", "description": "A wise professor knowledgeable about many subjects.", "prompt_template": "You are Professor Sage, sharing wisdom and knowledge. Be scholarly, thoughtful, and provide educational information in your responses."}
+    ]
+
+    try:
+        stmt = pg_insert(Character.__table__).values(characters).on_conflict_do_nothing(index_elements=['name'])
+        DBSession.execute(stmt)
+        DBSession.commit()
+        logger.info("Predefined characters added successfully.")
+    except Exception as e:
+        DBSession.rollback()
+        logger.error(f"Error adding predefined characters: {e}")
+    finally:
+        DBSession.remove()
 
 def add_character(name, description, prompt_template):
-    with app_context():
-        try:
-            if Character.query.filter_by(name=name).first():
-                return f"Character '{name}' already exists!"
-            new_character = Character(name=name, description=description, prompt_template=prompt_template)
-            db.session.add(new_character)
-            db.session.commit()
-            logger.info(f"Successfully added character: {name}")
-            return f"Character '{name}' added successfully!\nDescription: {description}"
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error adding character: {e}")
-            return f"An error occurred while adding the character: {str(e)}"
+    try:
+        if DBSession.query(Character.id).filter_by(name=name).first():
+            return f"Character '{name}' already exists!"
+        new_character = Character(name=name, description=description, prompt_template=prompt_template)
+        DBSession.add(new_character)
+        DBSession.commit()
+        _char_cache.cache_clear()
+        with _chars_lock:
+            _chars_cache.clear()
+        logger.info(f"Successfully added character: {name}")
+        return f"Character '{name}' added successfully!\nDescription: {description}"
+    except Exception as e:
+        DBSession.rollback()
+        logger.error(f"Error adding character: {e}")
+        return f"An error occurred while adding the character: {str(e)}"
+    finally:
+        DBSession.remove()
+
+@lru_cache(maxsize=256)
+def _char_cache(name):
+    """Return the (id, prompt_template) row for a character, cached per process."""
+    try:
+        return DBSession.query(Character.id, Character.prompt_template).filter_by(name=name).first()
+    finally:
+        DBSession.remove()
+
+# The character list rarely changes; cache it briefly and clear it when a character is added
+_chars_cache = TTLCache(maxsize=1, ttl=60)
+_chars_lock = threading.Lock()
+
+@cached(_chars_cache, lock=_chars_lock)
+def _load_characters():
+    try:
+        return DBSession.query(Character.name, Character.description).all()
+    finally:
+        DBSession.remove()
 
 def get_existing_characters():
-    with app_context():
-        try:
-            characters = Character.query.all()
-            return [(char.name, char.description) for char in characters]
-        except Exception as e:
-            logger.error(f"Error retrieving characters: {e}")
-            return [("Error retrieving characters", str(e))]
+    try:
+        return _load_characters()
+    except Exception as e:
+        logger.error(f"Error retrieving characters: {e}")
+        return [("Error retrieving characters", str(e))]
 
 def chat_with_character(character_name, user_input, user_id, chat_id=None):
-    with app_context():
-        try:
-            if not gemini_api_key:
-                raise ValueError("GEMINI_API_KEY is not set in the environment.")
-            
-            character = Character.query.filter_by(name=character_name).first()
-            if not character:
-                return "Character not found.", None
-            if not chat_id:
-                chat_id = str(uuid.uuid4())
-            previous_conversations = Conversation.query.filter_by(user_id=user_id).order_by(Conversation.timestamp).all()
-            context_prompt = " ".join([f"User: {conv.user_input}\nBot: {conv.bot_response}" for conv in previous_conversations])
-            prompt_template = character.prompt_template
-            full_prompt = f"{prompt_template}\n{context_prompt}\nUser: {user_input}\nBot:"
-
-            payload = {"contents": [{"parts": [{"text": full_prompt}]}]}
-            headers = {'Content-Type': 'application/json'}
-            response = requests.post(gemini_api_url, headers=headers, json=payload, params={'key': gemini_api_key})
-
-            if response.status_code == 200:
-                response_data = response.json()
+    """Yield (response_so_far, chat_id) as the Gemini reply streams in; the full reply is saved once complete."""
+    try:
+        if not gemini_api_key:
+            raise ValueError("GEMINI_API_KEY is not set in the environment.")
+        
+        character = _char_cache(character_name)
+        if not character:
+            yield "Character not found.", None
+            return
+        # Gradio may run each step of this generator on a different worker thread, so every
+        # DB access is closed before the next yield instead of holding the session open
+        if chat_id:
+            try:
+                previous_conversations = DBSession.query(Conversation.user_input, Conversation.bot_response) \
+                    .filter_by(user_id=user_id, chat_id=chat_id) \
+                    .order_by(Conversation.timestamp.desc()) \
+                    .limit(HISTORY_TURNS).all()
+            finally:
+                DBSession.remove()
+            previous_conversations.reverse()
+        else:
+            # A freshly generated chat_id has no history yet, so skip the query
+            chat_id = str(uuid.uuid4())
+            previous_conversations = []
+        context_prompt = "\n".join([f"User: {conv.user_input}\nBot: {conv.bot_response}" for conv in previous_conversations])
+        prompt_template = character.prompt_template
+        full_prompt = f"{prompt_template}\n{context_prompt}\nUser: {user_input}\nBot:"
+
+        payload = {"contents": [{"parts": [{"text": full_prompt}]}]}
+        with SESSION.post(STREAM_URL_WITH_KEY, data=orjson.dumps(payload), headers=BASE_HEADERS, timeout=GEMINI_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                logger.error(f"Error from Gemini API: {response.text}")
+                yield f"An error occurred while generating content: {response.status_code} - {response.text}", chat_id
+                return
+
+            bot_response = ""
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                response_data = orjson.loads(line[len(b"data:"):])
                 if 'candidates' in response_data and response_data['candidates']:
-                    bot_response = response_data['candidates'][0]['content']['parts'][0]['text']
-                    conversation = Conversation(character_id=character.id, user_input=user_input, bot_response=bot_response, chat_id=chat_id, user_id=user_id)
-                    db.session.add(conversation)
-                    db.session.commit()
-                    logger.info(f"Saved conversation with chat_id: {chat_id}")
-                    return bot_response, chat_id
-                else:
-                    return "An error occurred while generating content: Unexpected response format.", chat_id
-            else:
-                logger.error(f"Error from Gemini API: {response.json()}")
-                return f"An error occurred while generating content: {response.status_code} - {response.text}", chat_id
-        except Exception as e:
-            logger.error(f"Unexpected error in chat_with_character: {e}")
-            return f"An unexpected error occurred: {str(e)}", chat_id
-
-def speech_to_text(audio_file):
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file) as source:
-        audio_data = recognizer.record(source)
+                    parts = response_data['candidates'][0].get('content', {}).get('parts', [])
+                    bot_response += "".join(part.get('text', '') for part in parts)
+                    yield bot_response, chat_id
+
+        if not bot_response:
+            yield "An error occurred while generating content: Unexpected response format.", chat_id
+            return
         try:
-            return recognizer.recognize_google(audio_data)
-        except sr.UnknownValueError:
-            logger.error("Could not understand audio")
-            return None
-        except sr.RequestError as e:
-            logger.error(f"Could not request results from Google Speech Recognition service; {e}")
-            return None
+            conversation_id = DBSession.execute(
+                insert(Conversation).values(character_id=character.id, user_input=user_input, bot_response=bot_response, chat_id=chat_id, user_id=user_id)
+                .returning(Conversation.id)).scalar_one()
+            DBSession.commit()
+        finally:
+            DBSession.remove()
+        logger.info(f"Saved conversation {conversation_id} with chat_id: {chat_id}")
+    except Exception as e:
+        logger.error(f"Unexpected error in chat_with_character: {e}")
+        yield f"An unexpected error occurred: {str(e)}", chat_id
+
+def numpy_to_audio_data(audio):
+    """Convert Gradio's (sample_rate, samples) numpy audio into 16-bit mono sr.AudioData.
+
+    Float samples in [-1, 1] and integer PCM of any width (e.g. int32 from 24/32-bit
+    uploads, unsigned 8-bit) are rescaled to the int16 range before the cast.
+    """
+    import speech_recognition as sr
+
+    sample_rate, samples = audio
+    if np.issubdtype(samples.dtype, np.floating):
+        samples = np.clip(samples, -1.0, 1.0) * 32767
+    elif np.issubdtype(samples.dtype, np.unsignedinteger):
+        midpoint = (np.iinfo(samples.dtype).max + 1) / 2
+        samples = (samples - midpoint) / midpoint * 32767
+    elif samples.dtype != np.int16:
+        samples = samples / np.iinfo(samples.dtype).max * 32767
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    return sr.AudioData(samples.astype(np.int16).tobytes(), sample_rate, 2)
+
+def speech_to_text(audio):
+    # Imported lazily so startup doesn't pay for speech_recognition until audio arrives
+    import speech_recognition as sr
+
+    if isinstance(audio, tuple):
+        audio_data = numpy_to_audio_data(audio)
+    else:
+        with sr.AudioFile(audio) as source:
+            audio_data = sr.Recognizer().record(source)
+
+    try:
+        return sr.Recognizer().recognize_google(audio_data)
+    except sr.UnknownValueError:
+        logger.error("Could not understand audio")
+        return None
+    except sr.RequestError as e:
+        logger.error(f"Could not request results from Google Speech Recognition service; {e}")
+        return None
 
 def extract_audio_from_video(video_file):
-    audio_file_path = "temp_audio.wav"
+    # 16 kHz mono WAV is all Google Speech needs; ffmpeg skips decoding the video stream
+    # and pipes the result to stdout so nothing is written to disk
     try:
-        with VideoFileClip(video_file) as video:
-            video.audio.write_audiofile(audio_file_path)
+        proc = subprocess.run(["ffmpeg", "-nostdin", "-loglevel", "error", "-i", video_file,
+                               "-vn", "-ac", "1", "-ar", "16000", "-f", "wav", "pipe:1"],
+                              capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error extracting audio from video: {e}: {e.stderr.decode(errors='replace').strip()}")
+        return None
     except Exception as e:
         logger.error(f"Error extracting audio from video: {e}")
         return None
-    return audio_file_path
+    return io.BytesIO(proc.stdout)
+
+def video_to_text(video_file, cancelled=None):
+    """Return (extracted, text); extracted is False when ffmpeg could not pull the audio track."""
+    audio_buffer = extract_audio_from_video(video_file)
+    if audio_buffer is None:
+        return False, None
+    # Skip the billable speech request if the caller no longer needs the result
+    if cancelled is not None and cancelled.is_set():
+        return True, None
+    return True, speech_to_text(audio_buffer)
+
+@ttl_cache(maxsize=1, ttl=60)
+def check_api_status():
+    try:
+        # Plain request without SESSION's retry policy so a click is bounded by the 3 s timeout
+        response = requests.get(gemini_model_url, params={'key': gemini_api_key}, timeout=3)
+        return "✅ API connection successful!" if response.status_code == 200 else "❌ API connection failed!"
+    except requests.RequestException as e:
+        logger.error(f"Error checking API status: {e}")
+        return "❌ API connection failed!"
+
+def get_chat_history(user_id, offset=0):
+    try:
+        # Rows are formatted by PostgreSQL so only the finished page of strings is transferred
+        conversations = DBSession.execute(
+            text("SELECT id, format(E'User: %s\\nBot: %s at %s', user_input, bot_response, timestamp) "
+                 "FROM conversation WHERE user_id = :uid ORDER BY timestamp DESC LIMIT :limit OFFSET :offset"),
+            {"uid": user_id, "limit": HISTORY_LIMIT, "offset": offset}).all()
+        return conversations
+    except Exception as e:
+        logger.error(f"Error retrieving chat history: {e}")
+        return []
+    finally:
+        DBSession.remove()
 
-def get_chat_history(user_id):
-    with app_context():
-        try:
-            conversations = Conversation.query.filter_by(user_id=user_id).order_by(Conversation.timestamp).all()
-            return conversations
-        except Exception as e:
-            logger.error(f"Error retrieving chat history: {e}")
-            return []
+def refresh_chars():
+    return gr.update(value=get_existing_characters())
 
 def create_interface():
-    with app_context():
-        add_predefined_characters()
+    add_predefined_characters()
     
     with gr.Blocks(title="Character Chat System", theme=gr.themes.Default()) as iface:
         current_chat_id = gr.State(value=None)
@@ -205,6 +345,7 @@ def create_interface():
         chat_messages = gr.State(value=[])
         
         gr.Markdown("# 🎭 Character Chat System 🎭", elem_id="title")
+        existing_characters = get_existing_characters()
         
         with gr.Tab("Sign In"):
             user_id_input = gr.Textbox(label="User ID (Numeric)", placeholder="Enter your numeric User ID (e.g., 123)", elem_id="user_id_input", interactive=True, lines=2)
@@ -231,77 +372,107 @@ def create_interface():
                     add_character_btn.click(fn=add_character, inputs=[name_input, description_input, prompt_input], outputs=[add_character_response])
                 with gr.Column():
                     gr.Markdown("## 🌟 Existing Characters 🌟", elem_id="existing_chars_title")
-                    existing_characters = get_existing_characters()
                     character_list = gr.Dataframe(value=existing_characters, headers=["Name", "Description"], interactive=False, elem_id="character_list")
                     refresh_characters_btn = gr.Button("Refresh Character List")
-                    refresh_characters_btn.click(fn=lambda: gr.update(value=get_existing_characters()), outputs=[character_list])
+                    refresh_characters_btn.click(fn=refresh_chars, outputs=[character_list])
         
         with gr.Tab("Chat with Character"):
             with gr.Row():
-                character_dropdown = gr.Dropdown(label="Choose Character", choices=[char[0] for char in get_existing_characters()], elem_id="character_dropdown")
+                character_dropdown = gr.Dropdown(label="Choose Character", choices=[char[0] for char in existing_characters], elem_id="character_dropdown")
                 chat_id_display = gr.Textbox(label="Current Chat ID", interactive=False, elem_id="chat_id_display")
                 user_input = gr.Textbox(label="Your Message", placeholder="Type your message or use audio/video input", elem_id="user_input", lines=2)
-                audio_input = gr.Audio(label="Audio Input", type="filepath", elem_id="audio_input")
+                audio_input = gr.Audio(label="Audio Input", type="numpy", elem_id="audio_input")
                 video_input = gr.Video(label="Video Input", elem_id="video_input")
                 chat_btn = gr.Button("Send", variant="primary")
                 chat_response = gr.Chatbot(label="Chat Responses", elem_id="chat_response", height=300, type="messages")  # Updated to 'messages' type
 
-                def handle_chat(character_name, user_input, audio_file, video_file, user_id, chat_messages, current_chat_id):
+                def handle_chat(character_name, user_input, audio, video_file, user_id, chat_messages, current_chat_id):
                     if not user_id:
-                        return chat_messages, current_chat_id, "Please sign in with a numeric User ID first!"
+                        yield chat_messages, current_chat_id, "Please sign in with a numeric User ID first!"
+                        return
                     if not character_name:
-                        return chat_messages, current_chat_id, "Please select a character!"
+                        yield chat_messages, current_chat_id, "Please select a character!"
+                        return
                     final_input = user_input or ""
+
+                    # Transcribe audio and video concurrently on the worker pool
+                    video_cancelled = threading.Event()
+                    audio_future = EXECUTOR.submit(speech_to_text, audio) if audio else None
+                    video_future = EXECUTOR.submit(video_to_text, video_file, video_cancelled) if video_file else None
                     
-                    if audio_file:
-                        audio_text = speech_to_text(audio_file)
+                    if audio_future:
+                        audio_text = audio_future.result()
                         if audio_text:
                             final_input += f" {audio_text}"
                         else:
+                            # The video transcript is no longer needed; stop it if it hasn't finished
+                            if video_future:
+                                video_cancelled.set()
+                                video_future.cancel()
                             chat_messages.append({"role": "assistant", "content": "Could not understand audio."})
-                            return chat_messages, current_chat_id, None
+                            yield chat_messages, current_chat_id, None
+                            return
                     
-                    if video_file:
-                        audio_file_path = extract_audio_from_video(video_file)
-                        if audio_file_path:
-                            video_text = speech_to_text(audio_file_path)
+                    if video_future:
+                        extracted, video_text = video_future.result()
+                        if extracted:
                             if video_text:
                                 final_input += f" {video_text}"
                             chat_messages.append({"role": "user", "content": "Video uploaded"})
                         else:
                             chat_messages.append({"role": "assistant", "content": "Failed to extract audio from video."})
-                            return chat_messages, current_chat_id, None
+                            yield chat_messages, current_chat_id, None
+                            return
 
                     if not final_input.strip():
-                        return chat_messages, current_chat_id, "Please provide a message, audio, or video!"
+                        yield chat_messages, current_chat_id, "Please provide a message, audio, or video!"
+                        return
 
-                    response, new_chat_id = chat_with_character(character_name, final_input, user_id, current_chat_id)
                     chat_messages.append({"role": "user", "content": final_input})
-                    chat_messages.append({"role": "assistant", "content": response})
-                    return chat_messages, new_chat_id, new_chat_id
+                    chat_messages.append({"role": "assistant", "content": ""})
+                    # Stream the reply into the last message as chunks arrive
+                    for response, new_chat_id in chat_with_character(character_name, final_input, user_id, current_chat_id):
+                        chat_messages[-1]["content"] = response
+                        yield chat_messages, new_chat_id, new_chat_id
                 
-                chat_btn.click(fn=handle_chat, inputs=[character_dropdown, user_input, audio_input, video_input, user_id, chat_messages, current_chat_id], outputs=[chat_response, current_chat_id, chat_id_display])
+                chat_btn.click(fn=handle_chat, inputs=[character_dropdown, user_input, audio_input, video_input, user_id, chat_messages, current_chat_id], outputs=[chat_response, current_chat_id, chat_id_display], concurrency_limit=CONCURRENCY_LIMIT)
         
         with gr.Tab("Chat History"):
             with gr.Row():
                 gr.Markdown("## 📜 View Chat History 📜")
                 view_history_btn = gr.Button("View History", variant="primary")
+                history_page = gr.Number(label="Page", value=1, precision=0, minimum=1, elem_id="history_page")
+                prev_page_btn = gr.Button("Previous Page")
+                next_page_btn = gr.Button("Next Page")
                 chat_history_display = gr.Dataframe(label="Chat History", interactive=False)
 
-                def load_chat_history(user_id):
+                def load_chat_history(user_id, page):
                     if not user_id:
-                        return [("Error", "Please sign in with a numeric User ID to view chat history.")]
-                    history = get_chat_history(user_id)
-                    return [(conv.id, f"User: {conv.user_input}\nBot: {conv.bot_response} at {conv.timestamp}") for conv in history]
+                        return [("Error", "Please sign in with a numeric User ID to view chat history.")], 1
+                    page = max(int(page or 1), 1)
+                    return get_chat_history(user_id, offset=(page - 1) * HISTORY_LIMIT), page
+
+                def load_prev_page(user_id, page):
+                    return load_chat_history(user_id, (page or 1) - 1)
+
+                def load_next_page(user_id, page):
+                    # Stay on the current page once there is nothing older to show
+                    if user_id:
+                        rows, next_page = load_chat_history(user_id, (page or 1) + 1)
+                        if rows:
+                            return rows, next_page
+                    return load_chat_history(user_id, page)
 
-                view_history_btn.click(fn=load_chat_history, inputs=[user_id], outputs=[chat_history_display])
+                view_history_btn.click(fn=load_chat_history, inputs=[user_id, history_page], outputs=[chat_history_display, history_page], concurrency_limit=CONCURRENCY_LIMIT)
+                prev_page_btn.click(fn=load_prev_page, inputs=[user_id, history_page], outputs=[chat_history_display, history_page], concurrency_limit=CONCURRENCY_LIMIT)
+                next_page_btn.click(fn=load_next_page, inputs=[user_id, history_page], outputs=[chat_history_display, history_page], concurrency_limit=CONCURRENCY_LIMIT)
 
         with gr.Tab("API Status"):
             with gr.Row():
                 gr.Markdown("## 🔌 API Connection Status 🔌")
                 check_api_btn = gr.Button("Check API Status", variant="primary")
                 api_status_display = gr.Textbox(label="API Status", interactive=False)
-                check_api_btn.click(fn=lambda: "✅ API connection successful!" if requests.post(gemini_api_url, headers={'Content-Type': 'application/json'}, json={"contents": [{"parts": [{"text": "Hello"}]}]}, params={'key': gemini_api_key}).status_code == 200 else "❌ API connection failed!", outputs=[api_status_display])
+                check_api_btn.click(fn=check_api_status, outputs=[api_status_display])
     
     return iface
 
@@ -326,4 +497,7 @@ if __name__ == "__main__":
 
     chat_interface = create_interface()
     logger.info("Starting Gradio interface...")
+    # Gradio serves events from a thread pool; let every handler (Gemini and Google STT
+    # calls) overlap up to CONCURRENCY_LIMIT instead of the default of one at a time
+    chat_interface.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
     chat_interface.launch(share=True)
\ No newline at end of file